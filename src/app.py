@@ -1,8 +1,10 @@
 import tkinter as tk
 import threading
+import ctypes
 import time
 import math
-from typing import Dict, Tuple, Optional
+import types
+from typing import Dict, Mapping, Tuple, Optional
 
 try:
     import openvr
@@ -10,6 +12,11 @@ except Exception as e:
     openvr = None
     raise RuntimeError("openvr not available. install with: pip install openvr") from e
 
+try:
+    import numpy as np
+except Exception as e:
+    raise RuntimeError("numpy not available. install with: pip install numpy") from e
+
 # ---------- config ----------
 METERS_TO_PIXELS = 100
 ARROW_LENGTH_M = 0.30
@@ -17,63 +24,66 @@ TRIGGER_THRESHOLD = 0.30
 GRIP_THRESHOLD = 0.30
 THUMBTOUCH_THRESHOLD = 0.01
 ARROW_FLIP_SIGN = -1.0
-POLL_INTERVAL = 0.03
+POSE_INTERVAL = 1 / 90     # backend pacing when the HMD reports no display frequency
+RENDER_INTERVAL = 1 / 60   # gui redraw rate, independent of the tracking rate
+DEVICE_RESCAN_INTERVAL = 1.0
+COORD_EPSILON_PX = 0.5
+DEBUG_MAX_LINES = 8
 
 # base station
 BASESTATION_FOV_DEG = 120   # degrees
 BASESTATION_RANGE_M = 6.0   # meters
 
+# labels
+CONTROLLER_LABELS = {"Left": "Controller (Left)", "Right": "Controller (Right)", None: "Controller (??)"}
+
+# ---------- openvr constants ----------
+# bound once so the per-frame paths skip the module attribute lookups;
+# masks are built from the button ids (ButtonMaskFromId is 1 << id)
+_BM_TRIGGER = 1 << openvr.k_EButton_SteamVR_Trigger
+_BM_TOUCHPAD = 1 << openvr.k_EButton_SteamVR_Touchpad
+_BM_GRIP = 1 << openvr.k_EButton_Grip
+_TDC_HMD = openvr.TrackedDeviceClass_HMD
+_TDC_CONTROLLER = openvr.TrackedDeviceClass_Controller
+_TDC_TRACKER = openvr.TrackedDeviceClass_GenericTracker
+_TDC_REFERENCE = openvr.TrackedDeviceClass_TrackingReference
+_ROLE_LEFT = openvr.TrackedControllerRole_LeftHand
+_EV_DEVICE_CHANGED = frozenset((openvr.VREvent_TrackedDeviceActivated,
+                                openvr.VREvent_TrackedDeviceDeactivated,
+                                openvr.VREvent_TrackedDeviceUpdated))
+_EV_ROLE_CHANGED = openvr.VREvent_TrackedDeviceRoleChanged
+
 # ---------- exceptions ----------
 class SteamVRNotRunningError(RuntimeError):
     pass
 
 # ---------- helpers ----------
-def axis_value_safe(axis) -> float:
-    if axis is None:
-        return 0.0
-    try:
-        if hasattr(axis, "x"):
-            return float(axis.x)
-        return float(axis[0])
-    except (AttributeError, TypeError, IndexError):
-        return 0.0
-
-def detect_fingers_approx(state) -> list[str]:
-    if not state or not hasattr(state, "rAxis"):
-        return []
-    fingers = []
-    axes = list(getattr(state, "rAxis", []))
-
-    trigger_val = axis_value_safe(axes[1]) if len(axes) > 1 else 0.0
-    trigger_pressed = bool(getattr(state, "ulButtonPressed", 0) & openvr.ButtonMask.Trigger)
-    trigger_touched = bool(getattr(state, "ulButtonTouched", 0) & openvr.ButtonMask.Trigger)
-    if trigger_val >= TRIGGER_THRESHOLD or trigger_pressed or trigger_touched:
-        fingers.append("Index Finger")
-
-    thumb = bool(getattr(state, "ulButtonTouched", 0) & openvr.ButtonMask.Touchpad)
-    if not thumb and axes:
-        thumb = abs(axis_value_safe(axes[0])) > THUMBTOUCH_THRESHOLD
-    if thumb:
-        fingers.append("Thumb")
-
-    mapped = False
-    finger_names = ["Middle Finger", "Ring Finger", "Pinky Finger"]
-    for idx, name in zip([2, 3, 4], finger_names):
-        if len(axes) > idx and axis_value_safe(axes[idx]) >= GRIP_THRESHOLD:
-            fingers.append(name)
-            mapped = True
-    if not mapped:
-        grip_val = axis_value_safe(axes[2]) if len(axes) > 2 else 0.0
-        grip_pressed = bool(getattr(state, "ulButtonPressed", 0) & openvr.ButtonMask.Grip)
-        if grip_val >= GRIP_THRESHOLD or grip_pressed:
-            fingers.extend(finger_names)
-
-    seen, out = set(), []
-    for f in fingers:
-        if f not in seen:
-            out.append(f)
-            seen.add(f)
-    return out
+_AXES_FMT = ", ".join(["%.2f"] * 5)
+
+# bit n of the finger flags -> _FINGER_NAMES[n]
+_FINGER_NAMES = ("Index Finger", "Thumb", "Middle Finger", "Ring Finger", "Pinky Finger")
+_FINGER_STRINGS = tuple(", ".join(name for bit, name in enumerate(_FINGER_NAMES) if flags >> bit & 1) or "None"
+                        for flags in range(1 << len(_FINGER_NAMES)))
+_GRIP_FINGERS = 0b11100
+
+def detect_fingers_approx(state) -> str:
+    if state is None:
+        return _FINGER_STRINGS[0]
+    # rAxis is a fixed k_unControllerStateAxisCount (5) array of VRControllerAxis_t
+    axes = state.rAxis
+    thumb_x, trigger, middle, ring, pinky = axes[0].x, axes[1].x, axes[2].x, axes[3].x, axes[4].x
+    pressed = state.ulButtonPressed
+    touched = state.ulButtonTouched
+
+    flags = ((trigger >= TRIGGER_THRESHOLD or bool((pressed | touched) & _BM_TRIGGER))
+             | (bool(touched & _BM_TOUCHPAD) or abs(thumb_x) > THUMBTOUCH_THRESHOLD) << 1
+             | (middle >= GRIP_THRESHOLD) << 2
+             | (ring >= GRIP_THRESHOLD) << 3
+             | (pinky >= GRIP_THRESHOLD) << 4)
+    # no per-finger curl reported: a grip press counts as the whole hand
+    if not flags & _GRIP_FINGERS and pressed & _BM_GRIP:
+        flags |= _GRIP_FINGERS
+    return _FINGER_STRINGS[flags]
 
 def format_height_ft_in(y_m: float) -> str:
     cm = y_m * 100.0
@@ -81,12 +91,23 @@ def format_height_ft_in(y_m: float) -> str:
     feet, inches = divmod(int(round(total_inches)), 12)
     return f"{cm:.1f} cm / {feet} ft {inches} in"
 
-def forward_from_matrix(m) -> Tuple[float, float, float]:
-    try:
-        fx, fy, fz = float(m[2][0]), float(m[2][1]), float(m[2][2])
-        return (fx * ARROW_FLIP_SIGN, fy * ARROW_FLIP_SIGN, fz * ARROW_FLIP_SIGN)
-    except Exception:
-        return (0.0, 0.0, 1.0)
+def forward_from_matrix(m: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    # works on a single (3, 4) matrix or a (N, 3, 4) batch
+    return np.multiply(m[..., 2, :3], ARROW_FLIP_SIGN, out=out)
+
+# numpy mirror of the TrackedDevicePose_t fields we read, laid out from the ctypes offsets
+POSE_DTYPE = np.dtype({
+    "names": ["matrix", "valid", "connected"],
+    "formats": [(np.float32, (3, 4)), np.bool_, np.bool_],
+    "offsets": [openvr.TrackedDevicePose_t.mDeviceToAbsoluteTracking.offset,
+                openvr.TrackedDevicePose_t.bPoseIsValid.offset,
+                openvr.TrackedDevicePose_t.bDeviceIsConnected.offset],
+    "itemsize": ctypes.sizeof(openvr.TrackedDevicePose_t),
+})
+
+def pose_view(poses) -> np.ndarray:
+    # zero-copy structured view over a TrackedDevicePose_t array
+    return np.frombuffer(poses, dtype=POSE_DTYPE)
 
 def arrow_delta_from_forward(forward, length_m=ARROW_LENGTH_M, scale=METERS_TO_PIXELS):
     fx, _, fz = forward
@@ -115,16 +136,47 @@ class VRBackend:
             self.vr_system = openvr.VRSystem()
         except Exception as e:
             raise RuntimeError("could not obtain VRSystem from openvr") from e
+        self._frame_period, self._vsync_to_photons = self._display_timing()
 
-        self.devices: Dict[int, Dict] = {}
-        self.raw_states: Dict[int, Dict] = {}
-        self.left_fingers = "None"
-        self.right_fingers = "None"
+        # double buffer: the poll thread fills the back slot in place, then flips _snap_idx
+        self._snapshots = [self._new_snapshot(), self._new_snapshot()]
+        # read-only views handed to the gui; built once so snapshot() allocates nothing
+        self._snapshot_views = tuple(types.MappingProxyType(slot) for slot in self._snapshots)
+        self._snap_idx = 0
+        self.capture_raw_states = False
 
-        self._lock = threading.Lock()
         self._running = False
         self._thread: Optional[threading.Thread] = None
 
+        self._event = openvr.VREvent_t()
+        # device index -> (class, role), filled lazily and invalidated by device events
+        self._device_info: Dict[int, Tuple[int, Optional[str]]] = {}
+        self._next_rescan = 0.0
+
+    @staticmethod
+    def _new_snapshot() -> Dict:
+        count = openvr.k_unMaxTrackedDeviceCount
+        poses = (openvr.TrackedDevicePose_t * count)()
+        view = pose_view(poses)
+        mats = view["matrix"]
+        # struct-of-arrays, indexed by tracked device index
+        return {"version": 0,
+                "poses": poses,
+                "view": view,
+                "mats": mats,
+                "pos": mats[:, :, 3],
+                "fwd": forward_from_matrix(mats),
+                "present": np.zeros(count, dtype=bool),
+                "dev_class": np.zeros(count, dtype=np.int32),
+                "role": [None] * count,
+                # raw controller states, only filled while the debug overlay is shown
+                "has_state": np.zeros(count, dtype=bool),
+                "axes": np.zeros((count, 5), dtype=np.float32),
+                "pressed": np.zeros(count, dtype=np.uint64),
+                "touched": np.zeros(count, dtype=np.uint64),
+                "left_fingers": "None",
+                "right_fingers": "None"}
+
     def start(self):
         if self._running:
             return
@@ -141,90 +193,134 @@ class VRBackend:
         except Exception:
             pass
 
-    def _poll_loop(self):
-        while self._running:
+    def _drain_events(self):
+        event = self._event
+        try:
+            while self.vr_system.pollNextEvent(event):
+                if event.eventType in _EV_DEVICE_CHANGED:
+                    self._device_info.pop(event.trackedDeviceIndex, None)
+                elif event.eventType == _EV_ROLE_CHANGED:
+                    self._device_info.clear()
+        except Exception:
+            pass
+        # safety net for missed events: re-query every device once in a while
+        now = time.monotonic()
+        if now >= self._next_rescan:
+            self._device_info.clear()
+            self._next_rescan = now + DEVICE_RESCAN_INTERVAL
+
+    def _lookup_device(self, idx: int) -> Optional[Tuple[int, Optional[str]]]:
+        info = self._device_info.get(idx)
+        if info is not None:
+            return info
+        try:
+            device_class = self.vr_system.getTrackedDeviceClass(idx)
+        except Exception:
+            return None
+        role = None
+        if device_class == _TDC_CONTROLLER:
             try:
-                poses = self.vr_system.getDeviceToAbsoluteTrackingPose(
-                    openvr.TrackingUniverseStanding, 0, openvr.k_unMaxTrackedDeviceCount
-                )
+                role_id = self.vr_system.getControllerRoleForTrackedDeviceIndex(idx)
+                role = "Left" if role_id == _ROLE_LEFT else "Right"
             except Exception:
-                try:
-                    poses = openvr.VRCompositor().waitGetPoses()[0]
-                except Exception:
-                    poses = []
-
-            with self._lock:
-                present = set()
-                for idx, pose in enumerate(poses):
-                    if not pose:
-                        continue
-                    connected = getattr(pose, "bDeviceIsConnected", False) or getattr(pose, "bPoseIsValid", False)
-                    if not connected:
-                        self.devices.pop(idx, None)
-                        self.raw_states.pop(idx, None)
-                        continue
-                    try:
-                        device_class = self.vr_system.getTrackedDeviceClass(idx)
-                        m = pose.mDeviceToAbsoluteTracking
-                        x, y, z = float(m[0][3]), float(m[1][3]), float(m[2][3])
-                    except Exception:
-                        continue
-
-                    role = None
-                    if device_class == openvr.TrackedDeviceClass_Controller:
-                        try:
-                            role_id = self.vr_system.getControllerRoleForTrackedDeviceIndex(idx)
-                            role = "Left" if role_id == openvr.TrackedControllerRole_LeftHand else "Right"
-                        except Exception:
-                            pass
-
-                    forward = forward_from_matrix(m)
-                    self.devices[idx] = {"x": x, "y": y, "z": z,
-                                         "class": device_class, "role": role,
-                                         "forward": forward, "matrix": m}
-                    present.add(idx)
-
-                    if device_class == openvr.TrackedDeviceClass_Controller:
-                        state = None
-                        try:
-                            res = self.vr_system.getControllerStateAndPose(idx)
-                            state = res[0] if isinstance(res, tuple) else res
-                        except Exception:
-                            try:
-                                res2 = self.vr_system.getControllerState(idx)
-                                state = res2[0] if isinstance(res2, tuple) else res2
-                            except Exception:
-                                pass
-                        if state and hasattr(state, "rAxis"):
-                            axes = [(axis_value_safe(a), getattr(a, "y", 0.0)) for a in state.rAxis]
-                            pressed = int(getattr(state, "ulButtonPressed", 0))
-                            touched = int(getattr(state, "ulButtonTouched", 0))
-                            self.raw_states[idx] = {"axes": axes, "pressed": pressed, "touched": touched}
-                            fingers = detect_fingers_approx(state)
-                            if role == "Left":
-                                self.left_fingers = ", ".join(fingers) if fingers else "None"
-                            else:
-                                self.right_fingers = ", ".join(fingers) if fingers else "None"
+                pass
+        info = self._device_info[idx] = (device_class, role)
+        return info
+
+    def _display_timing(self) -> Tuple[float, float]:
+        hmd = openvr.k_unTrackedDeviceIndex_Hmd
+        try:
+            freq = self.vr_system.getFloatTrackedDeviceProperty(hmd, openvr.Prop_DisplayFrequency_Float)
+            to_photons = self.vr_system.getFloatTrackedDeviceProperty(hmd, openvr.Prop_SecondsFromVsyncToPhotons_Float)
+        except Exception:
+            return POSE_INTERVAL, 0.0
+        return (1.0 / freq if freq > 0 else POSE_INTERVAL), to_photons
+
+    def _seconds_since_vsync(self) -> Optional[float]:
+        try:
+            ok, since_vsync, _ = self.vr_system.getTimeSinceLastVsync()
+        except Exception:
+            return None
+        return since_vsync if ok else None
+
+    def _wait_poses(self, poses):
+        # wake once per vsync, then ask for the pose predicted for when that frame's photons go out;
+        # a stale vsync clock can report more than a frame, so only its phase in the frame is used
+        period = self._frame_period
+        since_vsync = (self._seconds_since_vsync() or 0.0) % period
+        time.sleep(period - since_vsync)
+        since_vsync = (self._seconds_since_vsync() or 0.0) % period
+        predicted = max(0.0, period - since_vsync + self._vsync_to_photons)
+        try:
+            return self.vr_system.getDeviceToAbsoluteTrackingPose(
+                openvr.TrackingUniverseStanding, predicted, poses
+            )
+        except Exception:
+            return []
+
+    def _controller_state(self, idx: int):
+        try:
+            ok, state = self.vr_system.getControllerState(idx)
+        except Exception:
+            return None
+        return state if ok else None
+
+    def _poll_loop(self):
+        while self._running:
+            self._drain_events()
+            front = self._snapshots[self._snap_idx]
+            back = self._snapshots[1 - self._snap_idx]
+            poses = self._wait_poses(back["poses"])
+
+            present, dev_class, roles = back["present"], back["dev_class"], back["role"]
+            has_state, axes, pressed, touched = back["has_state"], back["axes"], back["pressed"], back["touched"]
+            forward_from_matrix(back["mats"], out=back["fwd"])
+            present[:] = False
+            has_state[:] = False
+            capture_raw = self.capture_raw_states
+            left_fingers, right_fingers = front["left_fingers"], front["right_fingers"]
+            if len(poses):
+                view = back["view"]
+                connected = np.flatnonzero(view["connected"] | view["valid"]).tolist()
+            else:
+                connected = []
+            for idx in connected:
+                info = self._lookup_device(idx)
+                if info is None:
+                    continue
+                device_class, role = info
+
+                present[idx] = True
+                dev_class[idx] = device_class
+                roles[idx] = role
+
+                if device_class == _TDC_CONTROLLER:
+                    state = self._controller_state(idx)
+                    if state is not None:
+                        if capture_raw:
+                            has_state[idx] = True
+                            # rAxis is 5 packed (x, y) float pairs; keep the x column
+                            axes[idx] = np.frombuffer(state.rAxis, dtype=np.float32)[::2]
+                            pressed[idx] = state.ulButtonPressed
+                            touched[idx] = state.ulButtonTouched
+                        if role == "Left":
+                            left_fingers = detect_fingers_approx(state)
+                        else:
+                            right_fingers = detect_fingers_approx(state)
+                    else:
+                        if role == "Left":
+                            left_fingers = "None"
                         else:
-                            self.raw_states.pop(idx, None)
-                            if role == "Left":
-                                self.left_fingers = "None"
-                            else:
-                                self.right_fingers = "None"
-
-                for old in list(self.devices.keys()):
-                    if old not in present:
-                        self.devices.pop(old, None)
-                        self.raw_states.pop(old, None)
-
-            time.sleep(POLL_INTERVAL)
-
-    def snapshot(self):
-        with self._lock:
-            return {"devices": dict(self.devices),
-                    "raw_states": dict(self.raw_states),
-                    "left_fingers": self.left_fingers,
-                    "right_fingers": self.right_fingers}
+                            right_fingers = "None"
+
+            back["left_fingers"], back["right_fingers"] = left_fingers, right_fingers
+            back["version"] = front["version"] + 1
+
+            # a plain int store is atomic under the GIL, so this publishes the slot
+            self._snap_idx = 1 - self._snap_idx
+
+    def snapshot(self) -> Mapping:
+        return self._snapshot_views[self._snap_idx]
 
 # ---------- gui ----------
 class VRGui:
@@ -253,51 +349,200 @@ class VRGui:
         self.canvas = tk.Canvas(root, width=1000, height=720, bg="#0b0d0f")
         self.canvas.pack(fill="both", expand=True)
 
-        self.canvas_items: Dict[int, Dict[str, int]] = {}
+        self.canvas_items: Dict[int, Dict] = {}
+        self._last_height_key: Optional[int] = None
+        self._last_height_str = ""
         self._running = True
         self.root.protocol("WM_DELETE_WINDOW", self._on_close)
 
-        self._draw_grid()
-        self.root.bind("<Configure>", lambda e: self._draw_grid(force=True))
+        # grid is only rebuilt on resize / toggle, never per frame
+        self._grid_dirty = True
+        self._grid_size: Optional[Tuple[int, int]] = None
+        self._grid_img: Optional[tk.PhotoImage] = None
+        self.show_grid.trace_add("write", lambda *_: self._mark_grid_dirty())
+        # canvas size is cached here instead of asking winfo_* (a Tcl round-trip) every frame
+        self._w, self._h = 1000, 720
+        self._cx, self._cy = self._w / 2, self._h / 2
+        self.canvas.bind("<Configure>", self._on_canvas_configure)
+
+        # redraw only when the backend published a new snapshot or the view changed
+        self._drawn_version: Optional[int] = None
+        self._groups_shown: Dict[str, bool] = {}
+        self._view_dirty = True
+        for var in (self.show_labels, self.show_height, self.show_fingers,
+                    self.show_arrows, self.show_fovs, self.show_debug):
+            var.trace_add("write", lambda *_: self._mark_view_dirty())
+
+        self._create_overlay_items()
+        self.show_debug.trace_add("write", lambda *_: self._sync_raw_capture())
+        self._sync_raw_capture()
 
         self._tick()
 
-    def _draw_grid(self, force=False):
-        w, h = max(200, self.canvas.winfo_width()), max(200, self.canvas.winfo_height())
-        if force:
-            self.canvas.delete("__grid__")
+    def _create_overlay_items(self):
+        # persistent overlay items, updated in place instead of recreated per frame
+        self._debug_keys = tuple(f"debug_{i}" for i in range(DEBUG_MAX_LINES))
+        overlay = {"last": {}}
+        for key in ("left_fingers", "right_fingers"):
+            overlay[key] = self.canvas.create_text(0, 0, anchor="ne", text="", fill="#cce",
+                                                   font=("Segoe UI", 10), state="hidden",
+                                                   tags="__overlay__")
+        overlay["debug_rect"] = self.canvas.create_rectangle(0, 0, 0, 0, fill="#000000", outline="",
+                                                             state="hidden", tags="__overlay__")
+        for key in self._debug_keys:
+            overlay[key] = self.canvas.create_text(0, 0, anchor="sw", text="", fill="#aaa",
+                                                   font=("Consolas", 9), state="hidden",
+                                                   tags="__overlay__")
+        self.overlay_items = overlay
+
+    def _sync_raw_capture(self):
+        self.backend.capture_raw_states = self.show_debug.get()
+
+    def _on_canvas_configure(self, event):
+        w, h = max(200, event.width), max(200, event.height)
+        if (w, h) == (self._w, self._h):
+            return
+        dx, dy = w / 2 - self._cx, h / 2 - self._cy
+        self._w, self._h = w, h
+        self._cx, self._cy = w / 2, h / 2
+        # device items are laid out around the centre, so shift them all in one call
+        if dx or dy:
+            self.canvas.move("__devices__", dx, dy)
+            for items in self.canvas_items.values():
+                last = items["last"]
+                for key in ("shape", "label", "arrow", "fov"):
+                    coords = last.get(key)
+                    if coords is not None:
+                        last[key] = tuple(c + (dy if i % 2 else dx) for i, c in enumerate(coords))
+        self._mark_grid_dirty()
+
+    def _sync_group_visibility(self):
+        # hide a whole group with one tag-wide call when its toggle turns off;
+        # turning it back on goes through the per-item path, which knows what applies
+        for key, tag, var in (("label", "__labels__", self.show_labels),
+                              ("arrow", "__arrows__", self.show_arrows),
+                              ("fov", "__fovs__", self.show_fovs)):
+            shown = var.get()
+            if not shown and self._groups_shown.get(key, True):
+                self.canvas.itemconfigure(tag, state="hidden")
+                for items in self.canvas_items.values():
+                    if key in items:
+                        items["last"][(key, "state")] = "hidden"
+            self._groups_shown[key] = shown
+
+    def _mark_view_dirty(self):
+        self._view_dirty = True
+
+    def _mark_grid_dirty(self):
+        self._grid_dirty = True
+        self._view_dirty = True
+
+    def _draw_grid(self):
+        self._grid_dirty = False
         if not self.show_grid.get():
-            self.canvas.delete("__grid__")
+            self.canvas.itemconfigure("__grid__", state="hidden")
             return
-        self.canvas.delete("__grid__")
+        if self._grid_size != (self._w, self._h):
+            self._build_grid()
+        self.canvas.itemconfigure("__grid__", state="normal")
+
+    def _build_grid(self):
+        w, h = self._w, self._h
+        self._grid_size = (w, h)
+        # the lines are rasterised once per size into a single image item
+        grid_img = tk.PhotoImage(master=self.canvas, width=w, height=h)
         spacing = 50
-        for gx in range(0, w + spacing, spacing):
-            self.canvas.create_line(gx, 0, gx, h, fill="#171a1c", tags="__grid__")
-        for gy in range(0, h + spacing, spacing):
-            self.canvas.create_line(0, gy, w, gy, fill="#171a1c", tags="__grid__")
-        self.canvas.create_oval(w/2 - 6, h/2 - 6, w/2 + 6, h/2 + 6,
+        for gx in range(0, w, spacing):
+            grid_img.put("#171a1c", to=(gx, 0, gx + 1, h))
+        for gy in range(0, h, spacing):
+            grid_img.put("#171a1c", to=(0, gy, w, gy + 1))
+        self.canvas.delete("__grid__")
+        self._grid_img = grid_img
+        self.canvas.create_image(0, 0, image=grid_img, anchor="nw", tags="__grid__")
+        cx, cy = self._cx, self._cy
+        self.canvas.create_oval(cx - 6, cy - 6, cx + 6, cy + 6,
                                 fill="#9ccf8a", outline="", tags="__grid__")
         try:
             self.canvas.tag_lower("__grid__")
+            self.canvas.tag_lower("__fovs__")
         except Exception:
             pass
 
     def _ensure_items_for(self, idx: int):
         if idx in self.canvas_items:
             return
-        shape = self.canvas.create_oval(0, 0, 0, 0, fill="white")
+        shape = self.canvas.create_oval(0, 0, 0, 0, fill="white", tags="__devices__")
         label = self.canvas.create_text(0, 0, text="", anchor="w",
-                                        fill="white", font=("Segoe UI", 9))
+                                        fill="white", font=("Segoe UI", 9),
+                                        tags=("__devices__", "__labels__"))
         arrow = self.canvas.create_line(0, 0, 0, 0, fill="white",
-                                        width=2, arrow=tk.LAST)
-        self.canvas_items[idx] = {"shape": shape, "label": label, "arrow": arrow}
+                                        width=2, arrow=tk.LAST,
+                                        tags=("__devices__", "__arrows__"))
+        self.canvas_items[idx] = {"shape": shape, "label": label, "arrow": arrow, "last": {}}
+        self.canvas.tag_raise("__overlay__")
 
     def _remove_items_for(self, idx: int):
         items = self.canvas_items.pop(idx, None)
         if items:
-            for k in items.values():
-                self.canvas.delete(k)
-        self.canvas.delete(f"fov_{idx}")
+            for key in ("shape", "label", "arrow", "fov"):
+                if key in items:
+                    self.canvas.delete(items[key])
+
+    def _create_fov_item(self) -> int:
+        try:
+            item = self.canvas.create_polygon(0, 0, 0, 0, 0, 0,
+                                              fill="#1a1c20", outline="#1a1c20", stipple="gray75",
+                                              tags=("__devices__", "__fovs__"))
+        except tk.TclError:
+            item = self.canvas.create_polygon(0, 0, 0, 0, 0, 0,
+                                              fill="#cfefcf", outline="#55ff55",
+                                              tags=("__devices__", "__fovs__"))
+        self.canvas.tag_lower(item)
+        return item
+
+    def _update_fov(self, items: Dict, sx: float, sy: float, m):
+        if not self.show_fovs.get():
+            if "fov" in items:
+                self._set_config(items, "fov", state="hidden")
+            return
+        yaw_rad = yaw_from_matrix(m) + math.pi
+        half = math.radians(BASESTATION_FOV_DEG) / 2.0
+        range_px = BASESTATION_RANGE_M * METERS_TO_PIXELS
+        left_angle = yaw_rad - half
+        right_angle = yaw_rad + half
+        lx = sx + range_px * math.cos(left_angle)
+        ly = sy + range_px * math.sin(left_angle)
+        rx = sx + range_px * math.cos(right_angle)
+        ry = sy + range_px * math.sin(right_angle)
+
+        if "fov" not in items:
+            items["fov"] = self._create_fov_item()
+        self._set_coords(items, "fov", sx, sy, lx, ly, rx, ry)
+        self._set_config(items, "fov", state="normal")
+
+    def _set_coords(self, items: Dict, key: str, *coords: float):
+        last = items["last"].get(key)
+        if last is not None and all(abs(a - b) < COORD_EPSILON_PX for a, b in zip(last, coords)):
+            return
+        items["last"][key] = coords
+        self.canvas.coords(items[key], *coords)
+
+    def _set_config(self, items: Dict, key: str, **options):
+        last = items["last"]
+        changed = {opt: val for opt, val in options.items() if last.get((key, opt)) != val}
+        if not changed:
+            return
+        for opt, val in changed.items():
+            last[(key, opt)] = val
+        self.canvas.itemconfig(items[key], **changed)
+
+    def _hmd_height_label(self, y_m: float) -> str:
+        # the formatted text only changes every ~1 mm, so key the cache on that
+        key = int(round(y_m * 1000))
+        if key != self._last_height_key:
+            self._last_height_key = key
+            self._last_height_str = f"HMD | {format_height_ft_in(key / 1000.0)}"
+        return self._last_height_str
 
     def _tick(self):
         try:
@@ -309,131 +554,103 @@ class VRGui:
                                     fill="red", font=("Segoe UI", 14))
             return
 
-        devices, raw_states = snap["devices"], snap["raw_states"]
-        left_fingers, right_fingers = snap["left_fingers"], snap["right_fingers"]
-        w, h = max(200, self.canvas.winfo_width()), max(200, self.canvas.winfo_height())
-        self._draw_grid()
+        if self._view_dirty or snap["version"] != self._drawn_version:
+            self._view_dirty = False
+            self._drawn_version = snap["version"]
+            self._draw(snap)
 
-        self.canvas.delete("__fovs__")
-        if self.show_fovs.get():
-            for idx, info in devices.items():
-                if info.get("class") != openvr.TrackedDeviceClass_TrackingReference:
-                    continue
-                x, y, z = info["x"], info["y"], info["z"]
-                sx, sy = w/2 + x * METERS_TO_PIXELS, h/2 - z * METERS_TO_PIXELS
-                m = info.get("matrix")
-                if m is not None:
-                    yaw_rad = yaw_from_matrix(m)
-                    yaw_rad += math.pi
-                else:
-                    fx, _, fz = info.get("forward", (0.0, 0.0, 1.0))
-                    yaw_rad = math.atan2(-fz, fx)
-
-                half = math.radians(BASESTATION_FOV_DEG) / 2.0
-                range_px = BASESTATION_RANGE_M * METERS_TO_PIXELS
-                left_angle = yaw_rad - half
-                right_angle = yaw_rad + half
-                lx = sx + range_px * math.cos(left_angle)
-                ly = sy + range_px * math.sin(left_angle)
-                rx = sx + range_px * math.cos(right_angle)
-                ry = sy + range_px * math.sin(right_angle)
-
-                try:
-                    self.canvas.create_polygon(
-                        sx, sy, lx, ly, rx, ry,
-                        fill="#1a1c20", outline="#1a1c20", stipple="gray75",
-                        tags=(f"fov_{idx}", "__fovs__")
-                    )
-                except tk.TclError:
-                    self.canvas.create_polygon(
-                        sx, sy, lx, ly, rx, ry,
-                        fill="#cfefcf", outline="#55ff55",
-                        tags=(f"fov_{idx}", "__fovs__")
-                    )
+        if self._running:
+            self.root.after(int(RENDER_INTERVAL*1000), self._tick)
 
-        try:
-            self.canvas.tag_lower("__grid__")
-            self.canvas.tag_lower("__fovs__")
-        except Exception:
-            pass
+    def _draw(self, snap: Mapping):
+        mats, pos, fwd = snap["mats"], snap["pos"], snap["fwd"]
+        classes, roles = snap["dev_class"], snap["role"]
+        present = np.flatnonzero(snap["present"]).tolist()
+        left_fingers, right_fingers = snap["left_fingers"], snap["right_fingers"]
+        w, h, cx, cy = self._w, self._h, self._cx, self._cy
+        if self._grid_dirty:
+            self._draw_grid()
+        self._sync_group_visibility()
 
-        present = set()
-        for idx, info in devices.items():
+        for idx in present:
             self._ensure_items_for(idx)
-            present.add(idx)
 
-            x, y, z = info["x"], info["y"], info["z"]
-            dev_class, role = info["class"], info.get("role")
-            forward = info.get("forward", (0.0, 0.0, 1.0))
-            sx, sy = w/2 + x * METERS_TO_PIXELS, h/2 - z * METERS_TO_PIXELS
+            x, y, z = pos[idx].tolist()
+            dev_class, role = int(classes[idx]), roles[idx]
+            forward = fwd[idx].tolist()
+            sx, sy = cx + x * METERS_TO_PIXELS, cy - z * METERS_TO_PIXELS
 
-            if dev_class == openvr.TrackedDeviceClass_HMD:
+            if dev_class == _TDC_HMD:
                 fill, txt, size = "#ff5555", "HMD", 12
-            elif dev_class == openvr.TrackedDeviceClass_Controller:
+            elif dev_class == _TDC_CONTROLLER:
                 fill = "#4da6ff" if role == "Left" else "#00ffd1"
-                txt, size = f"Controller ({role or '??'})", 10
-            elif dev_class == openvr.TrackedDeviceClass_GenericTracker:
+                txt, size = CONTROLLER_LABELS[role], 10
+            elif dev_class == _TDC_TRACKER:
                 fill, txt, size = "#ffd166", "Tracker", 8
-            elif dev_class == openvr.TrackedDeviceClass_TrackingReference:
+            elif dev_class == _TDC_REFERENCE:
                 fill, txt, size = "#4cff4c", "Base Station", 12
             else:
                 fill, txt, size = "white", "Device", 8
 
             items = self.canvas_items[idx]
-            self.canvas.coords(items["shape"], sx-size, sy-size, sx+size, sy+size)
-            self.canvas.itemconfig(items["shape"], fill=fill)
+            self._set_coords(items, "shape", sx-size, sy-size, sx+size, sy+size)
+            self._set_config(items, "shape", fill=fill)
 
-            label_text = txt
-            if dev_class == openvr.TrackedDeviceClass_HMD and self.show_height.get():
-                label_text += f" | {format_height_ft_in(y)}"
             if self.show_labels.get():
-                self.canvas.itemconfig(items["label"], text=label_text, fill="white")
-                self.canvas.coords(items["label"], sx + size + 4, sy)
-                self.canvas.itemconfigure(items["label"], state="normal")
+                label_text = txt
+                if dev_class == _TDC_HMD and self.show_height.get():
+                    label_text = self._hmd_height_label(y)
+                self._set_coords(items, "label", sx + size + 4, sy)
+                self._set_config(items, "label", text=label_text, state="normal")
             else:
-                self.canvas.itemconfigure(items["label"], state="hidden")
+                self._set_config(items, "label", state="hidden")
 
-            if dev_class == openvr.TrackedDeviceClass_Controller and self.show_arrows.get():
+            if dev_class == _TDC_CONTROLLER and self.show_arrows.get():
                 dx, dy = arrow_delta_from_forward(forward)
-                self.canvas.coords(items["arrow"], sx, sy, sx+dx, sy+dy)
-                self.canvas.itemconfig(items["arrow"], fill=fill, state="normal")
+                self._set_coords(items, "arrow", sx, sy, sx+dx, sy+dy)
+                self._set_config(items, "arrow", fill=fill, state="normal")
             else:
-                self.canvas.itemconfig(items["arrow"], state="hidden")
+                self._set_config(items, "arrow", state="hidden")
+
+            if dev_class == _TDC_REFERENCE:
+                self._update_fov(items, sx, sy, mats[idx])
+            elif "fov" in items:
+                self._set_config(items, "fov", state="hidden")
 
         for old in list(self.canvas_items.keys()):
             if old not in present:
                 self._remove_items_for(old)
 
-        if not self.show_fovs.get():
-            self.canvas.delete("__fovs__")
-
-        self.canvas.delete("__fingers__")
+        overlay = self.overlay_items
         if self.show_fingers.get():
-            self.canvas.create_text(w-12, 12, anchor="ne",
-                                    text=f"Left Controller: {left_fingers}",
-                                    fill="#cce", font=("Segoe UI", 10),
-                                    tags="__fingers__")
-            self.canvas.create_text(w-12, 30, anchor="ne",
-                                    text=f"Right Controller: {right_fingers}",
-                                    fill="#cce", font=("Segoe UI", 10),
-                                    tags="__fingers__")
-
-        self.canvas.delete("__debug__")
+            self._set_coords(overlay, "left_fingers", w-12, 12)
+            self._set_config(overlay, "left_fingers", text=f"Left Controller: {left_fingers}", state="normal")
+            self._set_coords(overlay, "right_fingers", w-12, 30)
+            self._set_config(overlay, "right_fingers", text=f"Right Controller: {right_fingers}", state="normal")
+        else:
+            self._set_config(overlay, "left_fingers", state="hidden")
+            self._set_config(overlay, "right_fingers", state="hidden")
+
         if self.show_debug.get():
             lines = ["DEBUG: raw controller states"]
-            for di in sorted(raw_states.keys()):
-                rs = raw_states[di]
-                axes_str = ", ".join(f"{a[0]:.2f}" for a in rs.get("axes", [])[:5])
-                lines.append(f"Device {di}: axes[{axes_str}] pressed={rs.get('pressed',0)} touched={rs.get('touched',0)}")
-            if lines:
-                rect_h = 14 * len(lines)
-                self.canvas.create_rectangle(5, h-rect_h-5, 400, h-5, fill="#000000", outline="", tags="__debug__")
-            for i, ln in enumerate(reversed(lines)):
-                self.canvas.create_text(10, h-10-14*i, anchor="sw", text=ln,
-                                        fill="#aaa", font=("Consolas", 9), tags="__debug__")
-
-        if self._running:
-            self.root.after(int(POLL_INTERVAL*1000), self._tick)
+            axes, pressed, touched = snap["axes"], snap["pressed"], snap["touched"]
+            for di in np.flatnonzero(snap["has_state"]).tolist():
+                axes_str = _AXES_FMT % tuple(axes[di].tolist())
+                lines.append(f"Device {di}: axes[{axes_str}] pressed={int(pressed[di])} touched={int(touched[di])}")
+            del lines[DEBUG_MAX_LINES:]
+            rect_h = 14 * len(lines)
+            self._set_coords(overlay, "debug_rect", 5, h-rect_h-5, 400, h-5)
+            self._set_config(overlay, "debug_rect", state="normal")
+            for i, key in enumerate(self._debug_keys):
+                if i < len(lines):
+                    self._set_coords(overlay, key, 10, h-10-14*i)
+                    self._set_config(overlay, key, text=lines[-1-i], state="normal")
+                else:
+                    self._set_config(overlay, key, state="hidden")
+        else:
+            self._set_config(overlay, "debug_rect", state="hidden")
+            for key in self._debug_keys:
+                self._set_config(overlay, key, state="hidden")
 
     def _on_close(self):
         self._running = False